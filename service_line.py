@@ -34,7 +34,18 @@
 
 
 import numpy as np
-import random
+import sys
+import multiprocessing
+import heapq
+try:
+    from numba import njit, prange
+except ImportError:
+    # Without numba the kernels below run as plain Python functions (same results, much slower):
+    prange = range
+    def njit(*args,**kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
 
 
 
@@ -52,10 +63,10 @@ PRIORITY_PROBABILITY_PER_REQUEST = 0.2      # if there is a request this is the
 REQUEST_PROBABILITY_PER_TIME_UNIT = 0.013   # probability that there is a request in a single time unit
 SUBREQUEST_PROBABILITY_PER_REQUEST = 0.8    # probability that a request for hiearchical structure requires delegated executions 
 NR_OF_COLLABORATORS = 3                     # The hierarchy is with only one chief and this nr of direct collaborators
+DEBUG = False                               # True - the hierarchies are simulated step by step (shown and paused in every time unit)
 ###################################################
 # CONSTANT PARAMETERS (do not change them):
 ###################################################
-ID_REQUESTS = 1     # Identifier for requests (objects)
 ID_SERVICE_LINE = 1 # Identifier for service lines (objects)
 ID_HIERARCHY = 1    # Identifier for hierarchies (objects)
 ACTIVE_REQUEST = 1  # Value for active requests (to be served)
@@ -71,10 +82,306 @@ RESET = "\033[0m"   # Reset colors of characters
 RED = "\033[31m"    # Red color character
 GREEN = "\033[32m"  # Green color character
 BLUE = "\033[34m"   # Blue color character
+QUEUE_INITIAL_CAPACITY = 64 # Initial number of slots of the request arrays of a service line (doubled when full)
 ###################################################
 
 
 
+##########################################################################
+## JIT KERNELS: the simulation of a service line as a pure numeric
+##              function of arrays, compiled to native code by numba.
+##              The kernels use only typed arrays and scalars (no Python
+##              objects), so they run without holding the GIL.
+##########################################################################
+
+#############################################################################################
+# KERNEL: TOP OF THE HEAP (LOOKFORMAX and LOOKFORMIN)
+# It returns the slot of the request with max (heap_sign = -1) or min (heap_sign = +1) time to live among the ones
+# still to be handled, or -1 if there are none. Stale entries (completed requests or old time to live) are removed
+# from the heap while looking for the top (same rules of myServiceLine._top_of_heap).
+@njit(cache=True,nogil=True)
+def _top_of_heap_kernel(heap,heap_sign,status,ttl):
+    while len(heap) > 0:
+        (key,i) = heap[0]
+        if status[i] != REQUEST_COMPLETION and key == heap_sign*ttl[i]:
+            return i
+        heapq.heappop(heap)
+    return -1
+
+#############################################################################################
+# KERNEL: SEED OF THE PRNG OF THE KERNELS
+# The kernels draw from the PRNG of numba (one for every thread), it can be seeded only from compiled code.
+@njit(cache=True,nogil=True)
+def seed_kernels(seed):
+    np.random.seed(seed)
+
+#############################################################################################
+# KERNEL: RANDOM CHOICE AMONG n REQUESTS
+# It returns a random index in [0,n) drawn from the PRNG of the kernels, the same draw of the RANDOMCHOICE
+# strategy in _process_line: the queues of the lines make the same choices of the kernels (see seed_kernels).
+@njit(cache=True,nogil=True)
+def random_choice_kernel(n):
+    return np.random.randint(0,n)
+
+#############################################################################################
+# KERNEL: RANDOM ARRIVALS OF REQUESTS FOR A TIMELINE
+# It simulates the arrivals of the requests in every time unit by the PRNG (same rules of myServiceLine.run),
+# and returns the arrivals LOG as three arrays: time unit, time to serve and priority of every request.
+@njit(cache=True,nogil=True)
+def generate_arrivals_kernel(total_nr_of_time_units,request_probability,random_weights,max_time_to_serve,time_to_serve,random_priority,priority_probability):
+    arrivals_t = np.zeros(total_nr_of_time_units,dtype=np.int32)
+    arrivals_w = np.zeros(total_nr_of_time_units,dtype=np.int32)
+    arrivals_p = np.zeros(total_nr_of_time_units,dtype=np.uint8)
+    k = 0
+    for time_unit in range(total_nr_of_time_units):
+        if np.random.random() < request_probability:
+            arrivals_t[k] = time_unit
+            if random_weights:
+                arrivals_w[k] = np.random.randint(1,max_time_to_serve+1)
+            else:
+                arrivals_w[k] = time_to_serve
+            if random_priority and np.random.random() < priority_probability:
+                arrivals_p[k] = 1
+            k += 1
+    return arrivals_t[:k],arrivals_w[:k],arrivals_p[:k]
+
+#############################################################################################
+# KERNEL: EXECUTION OF A SINGLE REQUEST (slot i of the arrays of the line c, 0 is the chief)
+# Returns True if something has been done (same rules of myServiceLine.serve_request_idx).
+# Only the chief has WAITING requests: remaining[i] is the number of non-completed sub-requests of its slot i and
+# parent[c,i] is the slot of the chief that delegated the slot i of the collaborator c (-1 if none).
+# The counters of the line c are in line_counters[c] and its heap in heaps[c] if heap_sign[c] != 0 (see run_timeline_kernel).
+# It is inlined in the callers (as _process_line), a call for every slot and time unit costs more than the work itself.
+@njit(cache=True,nogil=True,inline='always')
+def _serve_slot(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,line_counters,heaps,heap_sign,c,i,time_unit):
+    s = status[c,i]
+    if s == ACTIVE_REQUEST:     # When ACTIVE decrement the time to live
+        ttl[c,i] -= 1
+        if ttl[c,i] > 0:
+            if heap_sign[c] != 0:   # the entry in the heap is now stale, push the updated one
+                heapq.heappush(heaps[c],(heap_sign[c]*ttl[c,i],np.int64(i)))
+        else:                   # If the time to live is zero the problem has been solved
+            status[c,i] = REQUEST_COMPLETION
+            completion_t[c,i] = time_unit
+            line_counters[c,0] -= 1
+            if prio[c,i] != 0:
+                line_counters[c,1] -= 1
+            line_counters[c,2] += time_unit - start_t[c,i] - min_dur[c,i]  # completed in the current time unit
+            line_counters[c,3] += 1
+            if parent[c,i] >= 0:    # the request of the chief waiting for this one has one less to wait for
+                remaining[parent[c,i]] -= 1
+        return True
+    elif s == WAITING_REQUEST:
+        if remaining[i] > 0:
+            return False                # it still waits for at least one sub-request
+        status[c,i] = ACTIVE_REQUEST    # otherwise it goes into an ACTIVE status (verification of results)
+        line_counters[c,0] += 1
+        return True
+    return False
+
+#############################################################################################
+# KERNEL: DECISION AND EXECUTION IN A LINE (line c, 0 is the chief)
+# It processes the requests in the queue of the line c by its strategy, with the same rules of
+# myServiceLine.process_queued_requests (priority requests first).
+@njit(cache=True,nogil=True,inline='always')
+def _process_line(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,prio_slots,line_counters,heaps,heap_sign,percentage,c,service_type,time_unit):
+    n = line_counters[c,4]
+    if line_counters[c,3] == n:
+        # the queue is empty (or all its requests are completed):
+        line_counters[c,7] += 1
+        if n > 0:
+            percentage[c] = 0.0
+        return
+    # skip the completed requests at the head of the queue:
+    h = line_counters[c,5]
+    while h < n and status[c,h] == REQUEST_COMPLETION:
+        h += 1
+    line_counters[c,5] = h
+    line_counters[c,6] += line_counters[c,0]
+    percentage[c] = line_counters[c,0]/n
+    # priority requests first (the first one in the queue that can be served): remove the completed ones from the top
+    # of the slots of the priority requests (one is still to be handled), then try them in the order of the queue
+    if line_counters[c,1] > 0:
+        p = line_counters[c,11]
+        while status[c,prio_slots[c,p]] == REQUEST_COMPLETION:
+            p += 1
+        line_counters[c,11] = p
+        for j in range(p,line_counters[c,10]):
+            i = prio_slots[c,j]
+            if status[c,i] != REQUEST_COMPLETION and _serve_slot(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,line_counters,heaps,heap_sign,c,i,time_unit):
+                return
+    if service_type == SEQUENTIAL:
+        for i in range(h,n):
+            if _serve_slot(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,line_counters,heaps,heap_sign,c,i,time_unit):
+                return
+        line_counters[c,7] += 1
+    elif service_type == CONCURRENT:
+        for i in range(h,n):
+            # the identifier of the request in the slot i is i + 1:
+            if _serve_slot(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,line_counters,heaps,heap_sign,c,i,time_unit) and i + 1 > line_counters[c,9]:
+                line_counters[c,9] = i + 1
+                # the remaining requests are after slot i (look for them from the last one):
+                remaining_requests = False
+                for j in range(n-1,i,-1):
+                    if status[c,j] != REQUEST_COMPLETION:
+                        remaining_requests = True
+                        break
+                if not remaining_requests: line_counters[c,9] = 0
+                return
+        line_counters[c,7] += 1
+    elif service_type == LOOKFORMAX or service_type == LOOKFORMIN:
+        # (first) request with max (or min) time to live among the ones still to be handled (top of the heap):
+        selected = _top_of_heap_kernel(heaps[c],heap_sign[c],status[c],ttl[c])
+        if selected < 0:
+            line_counters[c,7] += 1
+            return
+        _serve_slot(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,line_counters,heaps,heap_sign,c,selected,time_unit)
+    elif service_type == RANDOMCHOICE:
+        # choose uniformly one of the requests that can be served (ACTIVE, or WAITING with all the sub-requests completed):
+        nr_of_ready_requests = 0
+        for i in range(h,n):
+            if status[c,i] == ACTIVE_REQUEST or (status[c,i] == WAITING_REQUEST and remaining[i] == 0):
+                nr_of_ready_requests += 1
+        if nr_of_ready_requests == 0:
+            line_counters[c,7] += 1
+            return
+        r = np.random.randint(0,nr_of_ready_requests)
+        for i in range(h,n):
+            if status[c,i] == ACTIVE_REQUEST or (status[c,i] == WAITING_REQUEST and remaining[i] == 0):
+                if r == 0:
+                    _serve_slot(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,line_counters,heaps,heap_sign,c,i,time_unit)
+                    return
+                r -= 1
+
+#############################################################################################
+# KERNEL: TIMELINE SIMULATION OF A HIERARCHY (OR OF A SINGLE SERVICE LINE)
+# A single service line is simulated as a hierarchy without collaborators (only the chief, no delegations).
+# It receives the arrivals LOG as four arrays sorted by time unit: time unit, time to serve, priority and delegation
+# of every request; the strategies of chief and collaborators, the number of collaborators and the timeline length.
+# The lines are the rows of the arrays, the chief is the line 0. It returns the counters of every line:
+# line_counters[c] = (ACTIVE requests, priority requests still to be handled, sum of the extra durations, completed
+# requests, length of the queue, head of the queue, accumulated ACTIVE requests, times the line was empty,
+# max number of pending requests, concurrent_idx, number of priority requests and first of them that can be
+# not completed in prio_slots[c], the slots of its priority requests) and the percentage of active requests of every line,
+# then the final queues of the lines: (status, priority, time to live, arrival time, weight, completion time, remaining
+# sub-requests of the chief, delegating slots of the chief, slots of the priority requests), see myServiceLine._load_queue.
+@njit(cache=True,nogil=True)
+def run_timeline_kernel(arrivals_t,arrivals_w,arrivals_p,arrivals_d,chief_service_type,collaborator_service_type,nr_of_collaborators,total_nr_of_time_units):
+    k = arrivals_t.shape[0]     # a queue cannot be longer than the number of arrivals
+    L = nr_of_collaborators + 1
+    status = np.zeros((L,k),dtype=np.uint8)     # status of the requests
+    prio = np.zeros((L,k),dtype=np.uint8)       # priority of the requests
+    ttl = np.zeros((L,k),dtype=np.int32)        # time to live of the requests
+    start_t = np.zeros((L,k),dtype=np.int32)    # time of arrival of the requests
+    min_dur = np.zeros((L,k),dtype=np.int32)    # weights of the requests
+    completion_t = np.zeros((L,k),dtype=np.int32)   # completion time units of the requests
+    parent = np.full((L,k),-1,dtype=np.int32)   # slots of the chief delegating the requests
+    remaining = np.zeros(k,dtype=np.int32)      # non-completed sub-requests of the requests of the chief
+    prio_slots = np.zeros((L,k),dtype=np.int32) # slots of the priority requests in the order of the queue (min-heap of slots)
+    line_counters = np.zeros((L,12),dtype=np.int64)
+    percentage = np.zeros(L,dtype=np.float64)
+    # the lines with LOOKFORMAX (heap_sign -1) or LOOKFORMIN (+1) strategy keep their requests in a heap of (key,slot)
+    # with key = heap_sign*time_to_live (stale entries are skipped), the first item only gives the type of the heaps:
+    heap_sign = np.zeros(L,dtype=np.int64)
+    heaps = [[(np.int64(0),np.int64(0))] for _ in range(L)]
+    for c in range(L):
+        heaps[c].pop()
+        service_type = chief_service_type if c == 0 else collaborator_service_type
+        if service_type == LOOKFORMAX:
+            heap_sign[c] = -1
+        elif service_type == LOOKFORMIN:
+            heap_sign[c] = 1
+    a = 0   # next arrival to be inserted
+    for time_unit in range(total_nr_of_time_units):
+        if a < k and arrivals_t[a] == time_unit:
+            # new requests are arrived, insert all of them in the queues:
+            while a < k and arrivals_t[a] == time_unit:
+                chief_slot = line_counters[0,4]
+                # a delegated request is inserted in the chief (WAITING) and in every collaborator (ACTIVE sub-requests),
+                # otherwise only in the chief (ACTIVE):
+                nr_of_lines = L if arrivals_d[a] != 0 and L > 1 else 1
+                for c in range(nr_of_lines):
+                    i = line_counters[c,4]
+                    prio[c,i] = arrivals_p[a]
+                    ttl[c,i] = min_dur[c,i] = arrivals_w[a]
+                    start_t[c,i] = time_unit
+                    if arrivals_p[a] != 0:
+                        line_counters[c,1] += 1
+                        prio_slots[c,line_counters[c,10]] = i
+                        line_counters[c,10] += 1
+                    if heap_sign[c] != 0:
+                        heapq.heappush(heaps[c],(heap_sign[c]*ttl[c,i],np.int64(i)))
+                    if c == 0 and nr_of_lines > 1:
+                        status[c,i] = WAITING_REQUEST
+                        remaining[i] = nr_of_collaborators
+                    else:
+                        status[c,i] = ACTIVE_REQUEST
+                        if c > 0:
+                            parent[c,i] = chief_slot
+                        line_counters[c,0] += 1
+                    # verify how many requests in queue are in active status (at every insertion, as in the line):
+                    if line_counters[c,0] > line_counters[c,8]:
+                        line_counters[c,8] = line_counters[c,0]
+                    line_counters[c,4] += 1
+                a += 1
+            continue
+        if line_counters[0,3] == line_counters[0,4]:
+            # all the requests of the chief are completed and so their sub-requests: empty time unit for every line
+            for c in range(L):
+                line_counters[c,7] += 1
+                if line_counters[c,4] > 0:
+                    percentage[c] = 0.0
+            continue
+        # no arrival, serve the existing requests of the chief and then of every collaborator:
+        _process_line(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,prio_slots,line_counters,heaps,heap_sign,percentage,0,chief_service_type,time_unit)
+        for c in range(1,L):
+            _process_line(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,prio_slots,line_counters,heaps,heap_sign,percentage,c,collaborator_service_type,time_unit)
+    return line_counters,percentage,(status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,prio_slots)
+
+#############################################################################################
+# KERNEL: BATCH OF TIMELINE SIMULATIONS OF A SINGLE SERVICE LINE
+# It runs n_samples independent simulations (random arrivals) of a service line with the given strategy,
+# spreading the samples on all the cores. The sample s uses the PRNG seed (seed + s).
+# It returns the performance parameters of every sample as a (n_samples,5) array.
+@njit(cache=True,nogil=True,parallel=True)
+def run_all_samples(n_samples,seed,service_type,total_nr_of_time_units,request_probability,random_weights,max_time_to_serve,time_to_serve,random_priority,priority_probability):
+    metrics = np.zeros((n_samples,5),dtype=np.float64)
+    for s in prange(n_samples):
+        np.random.seed(seed+s)
+        arrivals_t,arrivals_w,arrivals_p = generate_arrivals_kernel(total_nr_of_time_units,request_probability,random_weights,max_time_to_serve,time_to_serve,random_priority,priority_probability)
+        arrivals_d = np.zeros(arrivals_t.shape[0],dtype=np.uint8)      # a single line does not delegate
+        (line_counters,percentage,_) = run_timeline_kernel(arrivals_t,arrivals_w,arrivals_p,arrivals_d,service_type,service_type,0,total_nr_of_time_units)
+        # average extra time of working of the completed requests (NaN if there are not completed requests):
+        metrics[s,0] = line_counters[0,2]/line_counters[0,3] if line_counters[0,3] > 0 else np.nan
+        metrics[s,1] = line_counters[0,6]/total_nr_of_time_units   # average active requests for time unit
+        metrics[s,2] = line_counters[0,7]
+        metrics[s,3] = percentage[0]
+        metrics[s,4] = line_counters[0,8]
+    return metrics
+#############################################################################################
+
+
+
+#############################################################################################
+# PROCEDURE: TEXT OF A REQUEST
+# It returns the string printed for a request in the queue: the tuple (id, arrival time, time to live,
+# priority, status letter), or an empty string for the completed requests (they are not shown).
+#############################################################################################
+def _format_request(r):
+    status = r.status
+    if status == ACTIVE_REQUEST:
+        return str((r.service_id,r.time_to_start,r.time_to_live,r.priority,"A"))
+    elif status == WAITING_REQUEST:
+        return str((r.service_id,r.time_to_start,r.time_to_live,r.priority,"W"))
+    elif status == REQUEST_COMPLETION:
+        #return str((r.service_id,r.time_to_start,r.time_to_live,r.priority,"C"))
+        return ""
+    else:
+        print("ERROR FROM .show_request(): bad request status, id",r.service_id)
+        quit()
+
+
+
 ##########################################################################
 ## Class of objects: myServiceRequest.
 ##                   This object is a service request.
@@ -83,72 +390,76 @@ class myServiceRequest:
 
     #####################################
     # ATTRIBUTES(myServiceRequest):
-    service_id = None           # Value of the identifier of the request (unique)
-    time_to_start = None        # Position of the timeline (time unit) when the request starts
-    time_to_live = None         # Real time number of the time units needed for the completion of the problem (real time weight)
-    minimum_duration = None     # Weight of the problem related to the request (minimum time units needed for completion)
-    time_of_completion = None   # Position of the timeline (time unit) when the related problem is completed
-    status = None               # Status of the request: ACTIVE (running), WAITING (for delegated), COMPLETION (removed)
-    priority = None             # If this is True then the request has to be served immediately
-    list_of_requests_it_is_waiting_for = None   # If the status is WAITING then this is the list of the delegated sub-requests
+    __slots__ = (
+        'service_line',  # Service line object that stores the request (all the data of the request are in its arrays)
+        'slot',          # Position of the request in the arrays of its service line
+    )
     ####################################
 
     #############################################################################################
     # METHODS(myServiceRequest): CONSTRUCTOR
-    # This is the constructor of the request-object, it requires the starting time, the priority and the list of the 
-    # deledated sub-requests if non-empty.
-    def __init__(self,time_to_start,time_to_live,activate_priority,list_of_requests_it_is_waiting_for = []):
-        global ID_REQUESTS,ACTIVE_REQUEST, WAITING_REQUEST
-        self.service_id = ID_REQUESTS   # set the value od the object identifier
-        ID_REQUESTS += 1                # increase the global identifier of the request-objects
-        self.time_to_start = time_to_start  # Starting time = time of request arrival
-        self.time_to_live = self.minimum_duration = time_to_live    # At the beginning time_to_live and minimum_duration are the same
-        self.priority = activate_priority   # Set the priority of the object
-        self.list_of_requests_it_is_waiting_for = list_of_requests_it_is_waiting_for    # Set the list of sub-requests
-        if list_of_requests_it_is_waiting_for == []:
-            self.status = ACTIVE_REQUEST    # if there are not sub-request the object is ACTIVE and running
-        else:
-            self.status = WAITING_REQUEST   # if there are sub-request the object waits for them to be completed
+    # This is the constructor of the request-object, it requires the service line and the slot where the request
+    # has been stored by myServiceLine.insert_new_incoming_request (the object is just a view of that slot).
+    def __init__(self,service_line,slot):
+        self.service_line = service_line    # Service line that holds the request arrays
+        self.slot = slot                    # Slot of the request in the arrays of the service line
+
+    #############################################################################################
+    # METHODS(myServiceRequest): ATTRIBUTES STORED IN THE SERVICE LINE ARRAYS
+    # Value of the identifier of the request (unique):
+    @property
+    def service_id(self):
+        return int(self.service_line._sid[self.slot])
+
+    # Position of the timeline (time unit) when the request starts:
+    @property
+    def time_to_start(self):
+        return int(self.service_line._start_t[self.slot])
+
+    # Real time number of the time units needed for the completion of the problem (real time weight):
+    @property
+    def time_to_live(self):
+        return int(self.service_line._ttl[self.slot])
+
+    # Weight of the problem related to the request (minimum time units needed for completion):
+    @property
+    def minimum_duration(self):
+        return int(self.service_line._min_dur[self.slot])
+
+    # Position of the timeline (time unit) when the related problem is completed (None if not completed):
+    @property
+    def time_of_completion(self):
+        if self.status != REQUEST_COMPLETION:
+            return None
+        return int(self.service_line._completion_t[self.slot])
+
+    # Status of the request: ACTIVE (running), WAITING (for delegated), COMPLETION (removed):
+    @property
+    def status(self):
+        return int(self.service_line._status[self.slot])
+
+    # If this is True then the request has to be served immediately:
+    @property
+    def priority(self):
+        return bool(self.service_line._prio[self.slot])
+
+    # If the status is WAITING then this is the list of the delegated sub-requests:
+    @property
+    def list_of_requests_it_is_waiting_for(self):
+        return self.service_line._sub_requests.get(self.slot,[])
 
     #############################################################################################
     # METHODS(myServiceRequest): EXECUTION
     # This methond receives as input the time unit of the timeline we're working on and
-    # serves the problem related to the request.
+    # serves the problem related to the request (the work is done by the service line on its arrays).
     def serve_request(self,time_unit):
-        if self.status == ACTIVE_REQUEST:   # When ACTIVE decrement the time to live
-            self.time_to_live -= 1
-            if self.time_to_live > 0:       # If the time to live is positive then the problem has been served 
-                return True                 # and the simulation goes on (return True)
-            else:
-                self.status = REQUEST_COMPLETION    # If the time to live is zero the problem has been solved 
-                self.time_of_completion = time_unit # Set the completion time with the current unit 
-                return True                         # and the simulation goes on (return True)
-        elif self.status == WAITING_REQUEST:
-            if self.list_of_requests_it_is_waiting_for == []:   # if the request is waiting but there are not sub-request: ERROR!
-                print("ERROR FROM .serve_request(): bad request waiting status, id",self.service_id)
-                quit()
-            else:                                   # If the request is waiting and there are sub-requests, we check their status
-                for r in self.list_of_requests_it_is_waiting_for:
-                    if r.status != REQUEST_COMPLETION:
-                        return False                # if there is at least one non-completed sub-request the request still waits (continue simulation with WAIT)
-                self.status = ACTIVE_REQUEST        # otherwise the request goes into an ACTIVE status (verification of results)
-                return True                         # continue simulation with ACTIVE
-        return False    # For any other status the request is not processed
+        return self.service_line.serve_request_idx(self.slot,time_unit)
 
     #############################################################################################
     # METHODS(myServiceRequest): PRINT DETAILS
     # This methond prints the object attributes:
     def show_request(self):
-        if  self.status == ACTIVE_REQUEST:
-            print((self.service_id,self.time_to_start,self.time_to_live,self.priority,"A"),end="")
-        elif  self.status == WAITING_REQUEST:
-            print((self.service_id,self.time_to_start,self.time_to_live,self.priority,"W"),end="")
-        elif  self.status == REQUEST_COMPLETION:
-            #print((self.service_id,self.time_to_start,self.time_to_live,self.priority,"C"),end="")
-            print(end="")
-        else:
-            print("ERROR FROM .show_request(): bad request status, id",self.service_id)
-            quit()
+        sys.stdout.write(_format_request(self))
     #############################################################################################
 
 
@@ -163,93 +474,306 @@ class myServiceLine:
 
     #####################################
     # ATTRIBUTES(myServiceLine):
-    service_line_id = None  # Value of the identifier of the request (unique)
-    queue = None            # list of request objects
-    arrivals = None         # LOG of the arrived requests
-    nr_of_times_empty_line = None           # Number of time slots where the queue is empty
-    percentage_of_active_requests = None    # Real time percentage of the active requests in the queue
-    accumulate_nr_of_active_requests = None # Variable used to calculate the mean value of the number of requests to be served in every slot
-    max_nr_of_pending_requests = None       # Real time number of requests in the queue that are in active status.
-    empty_time_unit = None  # 
-    concurrent_idx = None   # Value for rotating the selection of the requests to be served in the concurrent strategy
-    service_type = None     # Strategy of the line - can be: SEQUENTIAL,CONCURRENT,LOOKFORMAX,LOOKFORMIN,RANDOMCHOICE
+    __slots__ = (
+        'service_line_id',                   # Value of the identifier of the request (unique)
+        'arrivals',                          # LOG of the arrived requests
+        'nr_of_times_empty_line',            # Number of time slots where the queue is empty
+        'percentage_of_active_requests',     # Real time percentage of the active requests in the queue
+        'accumulate_nr_of_active_requests',  # Variable used to calculate the mean value of the number of requests to be served in every slot
+        'max_nr_of_pending_requests',        # Real time number of requests in the queue that are in active status.
+        'empty_time_unit',                   #
+        'concurrent_idx',                    # Value for rotating the selection of the requests to be served in the concurrent strategy
+        'service_type',                      # Strategy of the line - can be: SEQUENTIAL,CONCURRENT,LOOKFORMAX,LOOKFORMIN,RANDOMCHOICE
+        '_status',                           # Array of the status of the requests in the queue (one slot for every request, struct of arrays)
+        '_prio',                             # Array of the priority flags of the requests in the queue
+        '_ttl',                              # Array of the time to live of the requests in the queue
+        '_sid',                              # Array of the identifiers of the requests in the queue
+        '_start_t',                          # Array of the arrival time units of the requests in the queue
+        '_min_dur',                          # Array of the weights (minimum durations) of the requests in the queue
+        '_completion_t',                     # Array of the completion time units of the requests in the queue
+        '_sub_requests',                     # Dictionary slot -> list of the delegated sub-requests (only for WAITING requests)
+        '_remaining',                        # Array of the number of delegated sub-requests not yet completed (for WAITING requests)
+        '_parent_slot',                      # Array of the slots of the WAITING requests (in the parent line) delegating the requests, -1 if none
+        '_parent_line',                      # Service line whose WAITING requests delegated requests to this line (the chief in a hierarchy)
+        '_len',                              # Number of slots used in the arrays (length of the queue)
+        '_head',                             # First slot of the queue that is not completed (all the requests before it are completed)
+        '_n_completed',                      # Number of completed requests
+        '_sum_extra',                        # Sum of the extra time of working of the completed requests
+        '_n_active',                         # Number of ACTIVE requests in the queue
+        '_n_priority',                       # Number of requests with priority still to be handled (ACTIVE or WAITING)
+        '_heap',                             # For LOOKFORMAX and LOOKFORMIN: heap of (key,slot) with key = _heap_sign*time_to_live (stale entries are skipped)
+        '_heap_sign',                        # -1 for LOOKFORMAX (max-heap), +1 for LOOKFORMIN (min-heap)
+        '_prio_slots',                       # Slots of the requests with priority, in the order of the queue (a min-heap of slots)
+        '_prio_head',                        # First item of _prio_slots that can be not completed (the ones before it are completed)
+        '_rng',                              # PRNG of the line (np.random.Generator), used for the arrivals and to seed the random choices in run
+    )
     #####################################
 
     #############################################################################################
     # METHODS(myServiceLine): CONSTRUCTOR
     # This is the constructor of the Line-object, it requires the service type (the decision strategy).
-    def __init__(self,service_type):
+    # The seed of the PRNG of the line is optional (None means a random one), with a seed the simulation can be repeated.
+    def __init__(self,service_type,seed = None):
         global SEQUENTIAL,CONCURRENT,ID_SERVICE_LINE,LOOKFORMAX
         self.service_line_id = ID_SERVICE_LINE  # set the value od the Line identifier
         ID_SERVICE_LINE += 1                    # increase the global identifier of the Line-objects
         # Initialize attributes:
-        self.queue = list()         # Initialize the request queue as an empty list
         self.arrivals = list()      # Initialize the request arrival LOG as an empty list
         self.nr_of_times_empty_line = 0             # Set zero time slots with empty queue
         self.percentage_of_active_requests = 0      # Set zero percentage of active requests
         self.accumulate_nr_of_active_requests = 0   # Set no active requests
         self.max_nr_of_pending_requests = 0         # Set no pending requests
         self.concurrent_idx = 0   # Initialize the rotation of requests for concurrent strategy
+        self._rng = np.random.default_rng(seed)     # PRNG of the line (arrivals and seed of the random choices)
+        self.empty_time_unit = None
+        # Initialize the arrays of the requests (they grow when the queue is full):
+        self._status = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.uint8)
+        self._prio = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.uint8)
+        self._ttl = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._sid = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._start_t = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._min_dur = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._completion_t = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._remaining = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._parent_slot = np.zeros(QUEUE_INITIAL_CAPACITY,dtype=np.int32)
+        self._sub_requests = dict()
+        self._len = 0
+        self._head = 0
+        self._n_completed = 0
+        self._sum_extra = 0
+        self._n_active = 0
+        self._n_priority = 0
+        self._parent_line = None    # no line delegated requests to this one (yet)
+        self._heap = None           # only the strategies looking for max or min weight use the heap
+        self._heap_sign = None
+        self._prio_slots = list()   # the first request with priority is the one with the min slot
+        self._prio_head = 0
         # Verify the service type:
         if service_type == SEQUENTIAL or service_type == CONCURRENT or service_type == LOOKFORMAX or service_type == LOOKFORMIN or service_type == RANDOMCHOICE:
             self.service_type = service_type
+            # the strategies looking for max or min weight keep the requests in a heap:
+            if service_type == LOOKFORMAX:
+                self._heap = list()
+                self._heap_sign = -1
+            elif service_type == LOOKFORMIN:
+                self._heap = list()
+                self._heap_sign = 1
         else:
             print("ERROR FROM myServiceLine CONSTRUCTOR: unknown service line type",service_type)
             quit()
 
+    #############################################################################################
+    # METHODS(myServiceLine): RESET
+    # This methond brings the line back to the state of a new one (empty queue, LOG and counters) keeping its identifier,
+    # its strategy and the arrays already allocated, so the same object can run another simulation. The PRNG of the line
+    # is seeded again as in the constructor (None means a random one). The request objects of the queue are no more valid.
+    def reset(self,seed = None):
+        self.arrivals.clear()
+        self.nr_of_times_empty_line = 0
+        self.percentage_of_active_requests = 0
+        self.accumulate_nr_of_active_requests = 0
+        self.max_nr_of_pending_requests = 0
+        self.concurrent_idx = 0
+        self._rng = np.random.default_rng(seed)
+        self.empty_time_unit = None
+        self._sub_requests.clear()
+        self._len = 0
+        self._head = 0
+        self._n_completed = 0
+        self._sum_extra = 0
+        self._n_active = 0
+        self._n_priority = 0
+        self._parent_line = None
+        if self._heap is not None:
+            self._heap.clear()
+        self._prio_slots.clear()
+        self._prio_head = 0
+
     #############################################################################################
     # METHODS(myServiceLine): INSERT NEW PROBLEM TO SOLVE
     # This methond receives as input the time unit, the time to serve the request, the priority of the
     # request, and the list of the related sub-requests. Then it inserts the request in the queue.
-    def insert_new_incoming_request(self,time_unit,time_to_serve_the_request = TIME_TO_SERVE_A_REQUEST,activate_priority = False,list_of_requests_it_is_waiting_for = []):
-        global REQUEST_PROBABILITY_PER_TIME_UNIT,TIME_TO_SERVE_A_REQUEST,ACTIVE_REQUEST
-        # Create the new request object:
-        r = myServiceRequest(time_unit,time_to_serve_the_request,activate_priority,list_of_requests_it_is_waiting_for)
-        # Append the new request in the queue:
-        self.queue.append(r)
+    def insert_new_incoming_request(self,time_unit,time_to_serve_the_request = TIME_TO_SERVE_A_REQUEST,activate_priority = False,list_of_requests_it_is_waiting_for = None):
+        # Get the slot of the new request, if the arrays are full double them:
+        i = self._len
+        if i == self._status.shape[0]:
+            self._grow()
+        # Write the new request in the arrays:
+        self._sid[i] = i + 1            # set the value of the request identifier (unique in the line, it follows the slots)
+        self._start_t[i] = time_unit                # Starting time = time of request arrival
+        self._parent_slot[i] = -1                   # No request is waiting for this one (yet)
+        self._ttl[i] = self._min_dur[i] = time_to_serve_the_request    # At the beginning time_to_live and minimum_duration are the same
+        self._prio[i] = activate_priority           # Set the priority of the request
+        if activate_priority:
+            self._n_priority += 1
+            self._prio_slots.append(i)      # the slots grow, the list stays sorted
+        if not list_of_requests_it_is_waiting_for:
+            self._status[i] = ACTIVE_REQUEST    # if there are not sub-request the request is ACTIVE and running
+            self._n_active += 1
+        else:
+            self._status[i] = WAITING_REQUEST   # if there are sub-request the request waits for them to be completed
+            self._sub_requests[i] = list_of_requests_it_is_waiting_for
+            # link every sub-request to this request, they decrement its counter when completed:
+            self._remaining[i] = 0
+            for c in list_of_requests_it_is_waiting_for:
+                line = c.service_line
+                if line._parent_line is None:
+                    line._parent_line = self
+                elif line._parent_line is not self:
+                    print("ERROR FROM .insert_new_incoming_request(): the sub-requests of line",line.service_line_id,"already belong to another line")
+                    quit()
+                line._parent_slot[c.slot] = i
+                if c.status != REQUEST_COMPLETION:
+                    self._remaining[i] += 1
+        self._len += 1
+        if self._heap is not None:
+            heapq.heappush(self._heap,(self._heap_sign*time_to_serve_the_request,i))
         # Verify how many requests in queue are in active status, so they need to be served:
-        l = len([r for r in self.queue if r.status == ACTIVE_REQUEST])
-        if l > self.max_nr_of_pending_requests:
-            self.max_nr_of_pending_requests = l
+        if self._n_active > self.max_nr_of_pending_requests:
+            self.max_nr_of_pending_requests = self._n_active
         # Insert a new item in the arrived request LOG:
-        self.arrivals.append((time_unit,time_to_serve_the_request,activate_priority,(list_of_requests_it_is_waiting_for != [])))
-        # Return the new request object:
-        return r
+        self.arrivals.append((time_unit,time_to_serve_the_request,activate_priority,bool(list_of_requests_it_is_waiting_for)))
+        # Return the new request object (a view of the slot):
+        return myServiceRequest(self,i)
+
+    #############################################################################################
+    # METHODS(myServiceLine): QUEUE
+    # This methond returns the list of the request objects in the queue (views of the slots of the arrays).
+    @property
+    def queue(self):
+        return [myServiceRequest(self,i) for i in range(self._len)]
+
+    #############################################################################################
+    # METHODS(myServiceLine): GROW THE REQUEST ARRAYS
+    # This methond doubles the capacity of the request arrays keeping the stored requests.
+    def _grow(self):
+        capacity = 2*self._status.shape[0]
+        for name in ("_status","_prio","_ttl","_sid","_start_t","_min_dur","_completion_t","_remaining","_parent_slot"):
+            old = getattr(self,name)
+            new = np.zeros(capacity,dtype=old.dtype)
+            new[:self._len] = old[:self._len]
+            setattr(self,name,new)
+
+    #############################################################################################
+    # METHODS(myServiceLine): EXECUTION OF A SINGLE REQUEST
+    # This methond receives as input the slot of a request and the time unit of the timeline we're working on and
+    # serves the problem related to the request. It returns True if something has been done.
+    def serve_request_idx(self,i,time_unit):
+        status = self._status   # local bindings of the arrays used at every call
+        ttl = self._ttl
+        s = status[i]
+        if s == ACTIVE_REQUEST:   # When ACTIVE decrement the time to live
+            ttl[i] -= 1
+            if ttl[i] > 0:        # If the time to live is positive then the problem has been served
+                if self._heap is not None:  # the entry in the heap is now stale, push the updated one
+                    heapq.heappush(self._heap,(self._heap_sign*int(ttl[i]),i))
+                return True             # and the simulation goes on (return True)
+            else:
+                status[i] = REQUEST_COMPLETION        # If the time to live is zero the problem has been solved
+                self._completion_t[i] = time_unit           # Set the completion time with the current unit
+                self._n_completed += 1                      # accumulate its extra time of working (actual_end_time - actual_start_time - minimum_required_time)
+                self._sum_extra += time_unit - int(self._start_t[i]) - int(self._min_dur[i])
+                if self._parent_slot[i] >= 0:               # if a request is waiting for this one, it has one less to wait for
+                    self._parent_line._remaining[self._parent_slot[i]] -= 1
+                self._n_active -= 1                         # update the counters of the requests to be handled
+                if self._prio[i]:
+                    self._n_priority -= 1
+                return True                                 # and the simulation goes on (return True)
+        elif s == WAITING_REQUEST:
+            if self._remaining[i] > 0:
+                return False                    # if there is at least one non-completed sub-request the request still waits (continue simulation with WAIT)
+            status[i] = ACTIVE_REQUEST          # otherwise the request goes into an ACTIVE status (verification of results)
+            self._n_active += 1
+            return True                         # continue simulation with ACTIVE
+        return False    # For any other status the request is not processed
+
+    #############################################################################################
+    # METHODS(myServiceLine): TOP OF THE HEAP
+    # This methond returns the slot of the request with max (LOOKFORMAX) or min (LOOKFORMIN) time to live
+    # among the ones still to be handled, or -1 if there are none. Stale entries (completed requests or
+    # old time to live) are removed from the heap while looking for the top.
+    def _top_of_heap(self):
+        heap = self._heap
+        status = self._status
+        ttl = self._ttl
+        sign = self._heap_sign
+        _COMPL = REQUEST_COMPLETION
+        heappop = heapq.heappop
+        while heap:
+            (key,i) = heap[0]
+            if status[i] != _COMPL and key == sign*ttl[i]:
+                return i
+            heappop(heap)
+        return -1
+
+    #############################################################################################
+    # METHODS(myServiceLine): SERVE THE PRIORITY REQUESTS
+    # This methond serves the first request with priority in the queue that can be served (returns True), if any
+    # (otherwise it returns False). The slots of the priority requests are pushed in increasing order, so their min-heap
+    # is the sorted list _prio_slots: the completed requests are removed from its top (moving _prio_head) while looking
+    # for the first one, when it cannot be served (WAITING for its sub-requests) the next ones are tried in order.
+    def _serve_priority_request(self,time_unit):
+        slots = self._prio_slots
+        status = self._status
+        _COMPL = REQUEST_COMPLETION
+        n = len(slots)
+        p = self._prio_head
+        while p < n and status[slots[p]] == _COMPL:
+            p += 1
+        self._prio_head = p
+        serve = self.serve_request_idx
+        for j in range(p,n):
+            i = slots[j]
+            if status[i] != _COMPL and serve(i,time_unit):
+                return True
+        return False
 
     #############################################################################################
     # METHODS(myServiceLine): DECISION AND EXECUTION
     # This methond receives as input the time unit. Then process the requests in queue by a specific
     # strategy (one of 5 strategies provided). Also requests with priorities can be managed.
+    # The selections are vectorized operations on the request arrays of the line (or heap lookups).
     def process_queued_requests(self,time_unit):
+        l = self._len
+        if self._n_completed == l:
+            # If the queue is empty (or all its requests are completed) there is nothing to do for any strategy:
+            self.nr_of_times_empty_line += 1  # increase the number of time units where the queue is empty.
+            if l > 0:
+                self.percentage_of_active_requests = 0.0    # no active request in the queue
+            return False
+        # local bindings of the constants, arrays and methods used at every time unit:
+        _COMPL = REQUEST_COMPLETION
+        status = self._status
+        serve = self.serve_request_idx
+        flatnonzero = np.flatnonzero
+        service_type = self.service_type
+        # skip the completed requests at the head of the queue, they are never scanned again:
+        h = self._head
+        while h < l and status[h] == _COMPL:
+            h += 1
+        self._head = h
+        live = status[h:l] != _COMPL    # mask of the requests still to be handled (ACTIVE or WAITING) from the head
         #
         # If there are priority requests then the first of them in the list has to be served:
         # This is not a decision strategy, it is just mandatory for the system.
         #
-        l = len(self.queue)
-        if l > 0:
-            # handle only if the queue is non-empty;
-            # get the number of active requests to be served:
-            nr_of_active_requests = len([r for r in self.queue if r.status == ACTIVE_REQUEST])
-            # increase the variable to calculate (at the end) the mean value of the active requests number for every time slot:
-            self.accumulate_nr_of_active_requests += nr_of_active_requests
-            # get the real time percentage of active requests in the queue:
-            self.percentage_of_active_requests = nr_of_active_requests/l
-            # get the number of active requests with priority set in the queue:
-            l_priority = len([r for r in self.queue if r.priority])
-            if l_priority > 0:
-                # if there are active requests with priority set serve the first one in the queue:
-                for r in self.queue:
-                    if r.priority:
-                        if r.serve_request(time_unit):
-                            return True
+        # get the number of active requests to be served (kept up to date by insertions and executions):
+        nr_of_active_requests = self._n_active
+        # increase the variable to calculate (at the end) the mean value of the active requests number for every time slot:
+        self.accumulate_nr_of_active_requests += nr_of_active_requests
+        # get the real time percentage of active requests in the queue:
+        self.percentage_of_active_requests = nr_of_active_requests/l
+        # if there are requests with priority set serve the first one in the queue that can be served:
+        if self._n_priority > 0 and self._serve_priority_request(time_unit):
+            return True
         #
         # Strategy 1 - Sequential execution strategy - "Bureaucrat":
         #
-        if self.service_type == SEQUENTIAL:
+        if service_type == SEQUENTIAL:
             # In this strategy look for the first request in the queue that after served returns True:
             # True means that something has been done.
-            for r in self.queue:
-                if r.serve_request(time_unit):
+            for i in flatnonzero(live) + h:
+                if serve(i,time_unit):
                     return True
             # If no request with such condition has been found then the queue is empty:
             self.nr_of_times_empty_line += 1  # increase the number of time units where the queue is empty.
@@ -257,18 +781,19 @@ class myServiceLine:
         #
         # Strategy 2 - Concurrent execution strategy - "meticulous all-rounder":
         #
-        elif self.service_type == CONCURRENT:
+        elif service_type == CONCURRENT:
             # In this strategy the variable concurrent_idx (IDX) is used to select one by one all the active requests.
             # IDX starts from 0 and increases every time an active request is met.
-            for r in self.queue:
+            sid = self._sid
+            for i in flatnonzero(live) + h:
                 # look for the first request with ID greater than IDX that after served returns True:
-                if r.serve_request(time_unit) and r.service_id > self.concurrent_idx:
+                if serve(i,time_unit) and sid[i] > self.concurrent_idx:
                     # if that request is found and served them IDX gets its ID:
-                    self.concurrent_idx = r.service_id
-                    # get the remaining active requests in the queue:
-                    remaining_requests = [r1 for r1 in  self.queue if (r1.status == ACTIVE_REQUEST or r1.status == WAITING_REQUEST) and r1.service_id > self.concurrent_idx]
-                    # if there are not other active requests to be served then IDX restarts from zero (rotation):
-                    if len(remaining_requests) == 0: self.concurrent_idx = 0
+                    self.concurrent_idx = int(sid[i])
+                    # if there are not other active requests to be served then IDX restarts from zero (rotation).
+                    # The identifiers follow the slots so the requests with greater ID are the ones after i,
+                    # look at the last one first (usually it is still to be handled, no scan needed):
+                    if not (i < l-1 and (status[l-1] != _COMPL or (status[i+1:l-1] != _COMPL).any())): self.concurrent_idx = 0
                     return True
             # If no request with such condition has been found then the queue is empty:
             self.nr_of_times_empty_line += 1   # increase the number of time units where the queue is empty.
@@ -276,55 +801,42 @@ class myServiceLine:
         #
         # Strategy 3 - Look for max execution strategy - "Hard worker":
         #
-        elif self.service_type == LOOKFORMAX:
+        elif service_type == LOOKFORMAX:
             # In this strategy you first look for the request with the MAXIMUM weight then serve it:
-            request_with_max_weight = None  # Set the request ID to None
-            max_weight = -1                 # Set the max weight to -1
-            for r in self.queue:
-                # evaluate the current time to live of every request in the queue:
-                if r.time_to_live > max_weight:
-                    max_weight = r.time_to_live     # memorize the max weight (time to live)
-                    request_with_max_weight = r     # memorize the request with max weight
-            if request_with_max_weight == None:
-                # If no request with such condition has been found then the queue is empty:
+            i = self._top_of_heap()     # (first) request with max time to live among the ones still to be handled
+            if i < 0:
+                # If no request to be handled has been found then the queue is empty:
                 self.nr_of_times_empty_line += 1   # increase the number of time units where the queue is empty.
                 return False
-            else:
-                # if the request with max time to live has been found then serve it:
-                request_with_max_weight.serve_request(time_unit)
-                return True
+            serve(i,time_unit)
+            return True
         #
         # Strategy 4 - Look for min execution strategy - "Procrastinator":
         #
-        elif self.service_type == LOOKFORMIN:
+        elif service_type == LOOKFORMIN:
             # In this strategy you first look for the request with the MINIMUM weight then serve it:
-            request_with_min_weight = None # Set the request ID to None
-            min_weight = 3*RANDOM_MAX_TIME_TO_SERVE_A_REQUEST  # Set the min weight to 3 times the max time to serve a request
-            for r in self.queue:
-                # evaluate the current time to live of every request in the queue:
-                if r.time_to_live < min_weight:
-                    min_weight = r.time_to_live # memorize the min weight (time to live)
-                    request_with_min_weight = r # memorize the request with min weight
-            if request_with_min_weight == None:
-                # If no request with such condition has been found then the queue is empty:
+            i = self._top_of_heap()     # (first) request with min time to live among the ones still to be handled
+            if i < 0:
+                # If no request to be handled has been found then the queue is empty:
                 self.nr_of_times_empty_line += 1 # increase the number of time units where the queue is empty.
                 return False
-            else:
-                # if the request with min time to live has been found then serve it:
-                request_with_min_weight.serve_request(time_unit)
-                return True
+            serve(i,time_unit)
+            return True
         #
         # Strategy 5 - Random execution strategy:
         #
-        elif self.service_type == RANDOMCHOICE:
-            if self.queue == []:
-                # In this strategy you do nothing if the queue is empty:
-                self.nr_of_times_empty_line += 1  # increase the number of time units where the queue is empty.
+        elif service_type == RANDOMCHOICE:
+            # In this strategy you randomly choose a request in the queue that can be served and serve it:
+            # the ACTIVE ones and the WAITING ones with all their sub-requests completed (ready to be verified).
+            # The choice is drawn from the PRNG of the kernels (as in run_timeline_kernel, see seed_kernels):
+            ready = (status[h:l] == ACTIVE_REQUEST) | ((status[h:l] == WAITING_REQUEST) & (self._remaining[h:l] == 0))
+            ready_slots = flatnonzero(ready)
+            if ready_slots.shape[0] == 0:
+                # If no request can be served then the queue is empty:
+                self.nr_of_times_empty_line += 1   # increase the number of time units where the queue is empty.
                 return False
-            else:
-                r = random.choice(self.queue)   # In this strategy you randomly choose a request in the queue
-                r.serve_request(time_unit)      # and serve it, no matter what:
-                return True
+            serve(int(ready_slots[random_choice_kernel(ready_slots.shape[0])]) + h,time_unit)
+            return True
         #
         # Other strategies...
         #
@@ -343,75 +855,162 @@ class myServiceLine:
     # It runs the simulation of the service line work from 0 to TOTAL_NR_OF_TIME_UNITS in a unique timeline.
     # The arrivals LOG is very important if you want to run a simulation using the same request of another service line
     # that already worked, this to compare the performances. If you don't use it the method considers it empty and then
-    # makes it during the simulation.
-    def run(self,arrivals = []):
-        global TOTAL_NR_OF_TIME_UNITS, REQUEST_PROBABILITY_PER_TIME_UNIT, RANDOM_MAX_TIME_TO_SERVE_A_REQUEST, TIME_TO_SERVE_A_REQUEST, PRIORITY_PROBABILITY_PER_REQUEST
-        # run for the entire timeline:
-        for time_unit in range(TOTAL_NR_OF_TIME_UNITS):
-            if arrivals == []:
-                # there are not predefined arrivals so the request arrivals are simulated now:
-                if random.random() <  REQUEST_PROBABILITY_PER_TIME_UNIT:
-                    # if the random number (PRNG) is less than REQUEST_PROBABILITY_PER_TIME_UNIT then a new request is arrived:
-                    if RANDOM_VARIABLE_WEIGHTS:
-                        # the weight of the request is random, get it from the PRNG (it is the minimum time to serve it):
-                        random_time_to_serve_a_request = random.randint(1,RANDOM_MAX_TIME_TO_SERVE_A_REQUEST)
-                    else:
-                        # the weight of the request is NOT random, set it to TIME_TO_SERVE_A_REQUEST
-                        random_time_to_serve_a_request = TIME_TO_SERVE_A_REQUEST
-                    # evaluate the priority of the request always by a PRNG:
-                    activate_prioritized_request = False    # Set to NO priority.
-                    if RANDOM_PRIORITY_SET:
-                        # the priority can be set (when the RANDOM_PRIORITY_SET parameter is False no priority can be set):
-                        if random.random() <  PRIORITY_PROBABILITY_PER_REQUEST:
-                            # if the PRNG generates a random number that is less than PRIORITY_PROBABILITY_PER_REQUEST
-                            # the request is with priority:
-                            activate_prioritized_request = True
-                    # insert the new request in the queue:
-                    self.insert_new_incoming_request(time_unit,random_time_to_serve_a_request,activate_prioritized_request)
-                else:
-                    # if the random number (PRNG) is NOT less than REQUEST_PROBABILITY_PER_TIME_UNIT: 
-                    self.process_queued_requests(time_unit)     # then serve the existing requests:
+    # makes it before the simulation.
+    # The timeline itself is simulated by run_timeline_kernel on arrays, this method builds them from the LOG. The arrivals
+    # can also be given already as those arrays by arrival_arrays (then the LOG is not used): a tuple (time units,
+    # times to serve, priorities) sorted by time unit.
+    # The performance parameters are written in out if given (a np.array of 5 floats), otherwise in a new one.
+    def run(self,arrivals = None,out = None,arrival_arrays = None):
+        # local bindings of the simulation parameters:
+        T = TOTAL_NR_OF_TIME_UNITS
+        rp = REQUEST_PROBABILITY_PER_TIME_UNIT
+        mt = RANDOM_MAX_TIME_TO_SERVE_A_REQUEST
+        pp = PRIORITY_PROBABILITY_PER_REQUEST
+        if arrival_arrays is not None:
+            # there are predefined arrivals already as arrays, they are used as they are:
+            (arrivals_t,arrivals_w,arrivals_p) = arrival_arrays
+        elif not arrivals:
+            # there are not predefined arrivals so the request arrivals are simulated now for the entire timeline,
+            # with one vectorized PRNG draw for every decision of all the time units:
+            rng = self._rng
+            # a new request is arrived in the time units where the random number is less than REQUEST_PROBABILITY_PER_TIME_UNIT:
+            arrivals_t = np.flatnonzero(rng.random(T) < rp).astype(np.int32)
+            k = arrivals_t.shape[0]     # the other decisions are drawn only for the arrived requests
+            if RANDOM_VARIABLE_WEIGHTS:
+                # the weight of the request is random, get it from the PRNG (it is the minimum time to serve it):
+                arrivals_w = rng.integers(1,mt+1,k,dtype=np.int32)
+            else:
+                # the weight of the request is NOT random, set it to TIME_TO_SERVE_A_REQUEST
+                arrivals_w = np.full(k,TIME_TO_SERVE_A_REQUEST,dtype=np.int32)
+            if RANDOM_PRIORITY_SET:
+                # the priority can be set (when the RANDOM_PRIORITY_SET parameter is False no priority can be set),
+                # the request is with priority if the random number is less than PRIORITY_PROBABILITY_PER_REQUEST:
+                arrivals_p = (rng.random(k) < pp).astype(np.uint8)
             else:
-                # there are predefined arrivals so we can get the requests from the existing arrivals LOG provided as input of the method
-                # get the list of (time_unit,time_to_serve,priority) from the LOG where time_unit is the same as the current one:
-                search_result_list = [(x,y,z,_) for (x,y,z,_) in arrivals if x == time_unit]
-                if search_result_list == []:
-                    # if the list is empty then we have already inserted all the requests in the LOG
-                    # so, we just serve the existing requests in the queue:
-                    self.process_queued_requests(time_unit)
-                else:
-                    # if the list is NOT empty we get the first element of the list and create the corrisponding new request in the queue:
-                    (_,time_to_serve_the_request,activate_priority,_) = search_result_list[0]
-                    self.insert_new_incoming_request(time_unit,time_to_serve_the_request,activate_priority)
-        # At the end of the simulation:
-        # 1) look for all the requests in the queue that are completed (status REQUEST_COMPLETION):
-        d = [(r.time_of_completion-r.time_to_start-r.minimum_duration) for r in self.queue if r.status == REQUEST_COMPLETION]
-        if d == []:
-            # if there are not completed requests then a WARNING is issued and the simulation stopped:
-            print("SIMULATION WARNING: there are not completed requests for service line [",self.service_line_id,"]")
-            print("...simulation cannot go on!")
+                arrivals_p = np.zeros(k,dtype=np.uint8)
+        else:
+            # there are predefined arrivals so we get the requests from the existing arrivals LOG provided as input of the method,
+            # sorted by time unit (all the requests of a time unit in the timeline arrive):
+            arrivals_t = np.array([x for (x,_,_,_) in arrivals],dtype=np.int32)
+            order = np.argsort(arrivals_t,kind="stable")
+            order = order[(arrivals_t[order] >= 0) & (arrivals_t[order] < T)]  # the records out of the timeline are ignored
+            arrivals_t = arrivals_t[order]
+            arrivals_w = np.array([y for (_,y,_,_) in arrivals],dtype=np.int32)[order]
+            arrivals_p = np.array([z for (_,_,z,_) in arrivals],dtype=np.uint8)[order]
+        # insert the arrived requests in the arrivals LOG:
+        self.arrivals.extend(zip(arrivals_t.tolist(),arrivals_w.tolist(),(arrivals_p != 0).tolist(),[False]*arrivals_t.shape[0]))
+        # run the simulation of the entire timeline (the random choices of the kernel are seeded by the PRNG of the line):
+        if self.service_type == RANDOMCHOICE:
+            seed_kernels(int(self._rng.integers(2**31)))
+        # (a single line is simulated as a hierarchy without collaborators):
+        (line_counters,percentage,queues) = run_timeline_kernel(arrivals_t,arrivals_w,arrivals_p,np.zeros(arrivals_t.shape[0],dtype=np.uint8),
+                                                                self.service_type,self.service_type,0,T)
+        # the line gets the final queue and the counters of the kernel:
+        self._load_queue(0,line_counters,percentage,queues)
+        # return the performance parameters of the simulation:
+        # (average extra time of working, average active requests for time unit, times the line was empty,
+        # percentage of active requests in the queue at the end, max number of pending requests)
+        return self.get_performance_parameters(out)
+
+    #############################################################################################
+    # METHODS(myServiceLine): QUEUE FROM THE KERNEL
+    # This methond receives as input the line c of the results of run_timeline_kernel (counters, percentage and final
+    # queues) and sets the queue and the counters of the line as if the timeline had been simulated on it, so the
+    # queue, the request objects and the performance parameters can be used after run. The delegations between the
+    # lines (sub-requests of the chief) are restored by myServiceLineHierarchy.run_on_arrays.
+    def _load_queue(self,c,line_counters,percentage,queues):
+        (status,prio,ttl,start_t,min_dur,completion_t,remaining,parent,prio_slots) = queues
+        n = int(line_counters[c,4])
+        # the previous queue is replaced, grow the arrays until the new one can be stored:
+        self._len = 0
+        while self._status.shape[0] < n:
+            self._grow()
+        self._status[:n] = status[c,:n]
+        self._prio[:n] = prio[c,:n]
+        self._ttl[:n] = ttl[c,:n]
+        self._sid[:n] = np.arange(1,n+1)    # the identifier of the request in the slot i is i + 1
+        self._start_t[:n] = start_t[c,:n]
+        self._min_dur[:n] = min_dur[c,:n]
+        self._completion_t[:n] = completion_t[c,:n]
+        self._remaining[:n] = remaining[:n] if c == 0 else 0    # only the chief has WAITING requests
+        self._parent_slot[:n] = parent[c,:n]
+        self._sub_requests.clear()
+        self._parent_line = None
+        # counters of the queue:
+        self._len = n
+        self._head = int(line_counters[c,5])
+        self._n_active = int(line_counters[c,0])
+        self._n_priority = int(line_counters[c,1])
+        self._sum_extra = int(line_counters[c,2])
+        self._n_completed = int(line_counters[c,3])
+        self._prio_slots = prio_slots[c,:line_counters[c,10]].tolist()
+        self._prio_head = int(line_counters[c,11])
+        if self._heap is not None:
+            # the heap of the requests still to be handled (without stale entries):
+            self._heap = [(self._heap_sign*int(self._ttl[i]),i) for i in np.flatnonzero(self._status[:n] != REQUEST_COMPLETION).tolist()]
+            heapq.heapify(self._heap)
+        # reporting counters:
+        self.accumulate_nr_of_active_requests = int(line_counters[c,6])
+        self.nr_of_times_empty_line = int(line_counters[c,7])
+        self.max_nr_of_pending_requests = int(line_counters[c,8])
+        self.concurrent_idx = int(line_counters[c,9])
+        self.percentage_of_active_requests = float(percentage[c])
+
+    #############################################################################################
+    # METHODS(myServiceLine): PERFORMANCE PARAMETERS
+    # This methond calculates the performance parameters of the line from its counters, after a timeline simulated
+    # by run (also as a line of a hierarchy) or driven by insert_new_incoming_request and process_queued_requests,
+    # and writes them in out if given (a np.array of 5 floats), otherwise in a new one (run returns them).
+    def get_performance_parameters(self,out = None):
+        if self._n_completed == 0:
+            # if there are not completed requests the parameters cannot be calculated, the caller can go on with other arrivals:
+            raise RuntimeError(f"no completed requests for service line {self.service_line_id}")
+        if out is None:
+            out = np.empty(5,dtype=float)
+        out[0] = self._sum_extra/self._n_completed   # average extra time of working during the simulation
+        out[1] = self.accumulate_nr_of_active_requests/TOTAL_NR_OF_TIME_UNITS   # average active requests for time unit
+        out[2] = self.nr_of_times_empty_line
+        out[3] = self.percentage_of_active_requests
+        out[4] = self.max_nr_of_pending_requests
+        return out
+
+    #############################################################################################
+    # METHODS(myServiceLine): BATCH OF TIMELINE SIMULATIONS
+    # This methond runs n_samples independent simulations of a service line with the given strategy (every one with
+    # its own random arrivals) in parallel, by the run_all_samples kernel. If the seed is None a random one is used.
+    # It returns the performance parameters of the samples as a (n,5) np.array (see run), n <= n_samples: the samples
+    # without completed requests are discarded (RuntimeError if none is left).
+    @classmethod
+    def run_batch(cls,service_type,n_samples,seed = None):
+        if not (service_type == SEQUENTIAL or service_type == CONCURRENT or service_type == LOOKFORMAX or service_type == LOOKFORMIN or service_type == RANDOMCHOICE):
+            print("ERROR FROM myServiceLine.run_batch(): unknown service line type",service_type)
             quit()
-        # if there are complete requests we calculate for each of them the extra time of working that is
-        # (actual_end_time - actual_start_time - minimum_required_time)
-        # just after that get the mean of the values in the list (average extra time of working during the simulation):
-        average_extra_duration = np.mean(np.array(d))
-        # 2) calculate the average_active_requests_for_time_unit:
-        average_active_requests_for_time_unit = self.accumulate_nr_of_active_requests/TOTAL_NR_OF_TIME_UNITS
-        # 3) return the performance parameters of the simulation:
-        return np.array([average_extra_duration,average_active_requests_for_time_unit,self.nr_of_times_empty_line,self.percentage_of_active_requests,self.max_nr_of_pending_requests])
+        if seed is None:
+            seed = int(np.random.default_rng().integers(2**31-n_samples))
+        metrics = run_all_samples(n_samples,seed,service_type,TOTAL_NR_OF_TIME_UNITS,REQUEST_PROBABILITY_PER_TIME_UNIT,RANDOM_VARIABLE_WEIGHTS,
+                                  RANDOM_MAX_TIME_TO_SERVE_A_REQUEST,TIME_TO_SERVE_A_REQUEST,RANDOM_PRIORITY_SET,PRIORITY_PROBABILITY_PER_REQUEST)
+        completed = ~np.isnan(metrics[:,0])
+        if not completed.all():
+            # the samples without completed requests are discarded (a WARNING is issued), at least one has to be left:
+            if not completed.any():
+                raise RuntimeError("no completed requests in any sample of the batch")
+            print("SIMULATION WARNING: there are not completed requests in",n_samples-int(completed.sum()),"samples of the batch, discarded")
+            metrics = metrics[completed]
+        return metrics
 
     #############################################################################################
     # METHODS(myServiceRequest): PRINT DETAILS
-    # This methond prints the object attributes:
+    # This methond prints the object attributes (the text of the queue is built and written at once):
     def show_queue(self):
-        print("Line",self.service_line_id,end="")
-        if self.queue == []: 
-            print([],end="")
+        parts = ["Line ",str(self.service_line_id)]
+        if self._len == 0: 
+            parts.append("[]")
         else:
-            print("[",end="")
-            for r in self.queue:
-                r.show_request()
-            print("]",end="")
+            parts.append("[")
+            # the requests before the head are completed and not shown:
+            parts.extend([_format_request(myServiceRequest(self,i)) for i in range(self._head,self._len)])
+            parts.append("]")
+        sys.stdout.write("".join(parts))
     #############################################################################################
 
 
@@ -427,26 +1026,40 @@ class myServiceLineHierarchy:
 
     #####################################
     # ATTRIBUTES(myServiceLineHierarchy):
-    hierarchy_id = None             # Value of the identifier of the request (unique)
-    chief = None                    # Service Line object of the chief
-    list_of_collaborators = None    # List of the service lines of the collaborators
-    nr_of_collaborators = None      # Number of collaborators
+    __slots__ = (
+        'hierarchy_id',           # Value of the identifier of the request (unique)
+        'chief',                  # Service Line object of the chief
+        'list_of_collaborators',  # List of the service lines of the collaborators
+        'nr_of_collaborators',    # Number of collaborators
+        '_rng',                   # PRNG of the hierarchy (np.random.Generator), used for the arrivals and to seed the random choices
+    )
     #####################################
 
     #############################################################################################
     # METHODS(myServiceLineHierarchy): CONSTRUCTOR
     # This is the constructor of the Hierarchical-Line-object, it requires the service type for
     # both chief and collaborators and the number of collaborators. Chief and collaborators can
-    # use different strategies (by default SEQUENTIAL).
-    def __init__(self,chief_service_type = SEQUENTIAL, nr_of_collaborators = 2, collaborator_service_type = SEQUENTIAL):
+    # use different strategies (by default SEQUENTIAL). The seed of the PRNG of the hierarchy is optional
+    # (None means a random one), with a seed the simulation can be repeated.
+    def __init__(self,chief_service_type = SEQUENTIAL, nr_of_collaborators = 2, collaborator_service_type = SEQUENTIAL, seed = None):
         global ID_HIERARCHY
         self.hierarchy_id = ID_HIERARCHY    # set the identifier of the Hierarchical-Line-object
         ID_HIERARCHY += 1                   # increase the global identifier of the Hierarchical-Line-objects
         self.chief = myServiceLine(chief_service_type) # create the service line object of the chief
         self.nr_of_collaborators = nr_of_collaborators # set the number of collaborators attribute
-        self.list_of_collaborators = list()     # create an empty list
-        for i in range(nr_of_collaborators):    # insert in the list as many service line objects as the number of collaborators:
-            self.list_of_collaborators.append(myServiceLine(collaborator_service_type))
+        self._rng = np.random.default_rng(seed)        # PRNG of the hierarchy (arrivals of the requests)
+        # create the list with as many service line objects as the number of collaborators:
+        self.list_of_collaborators = [myServiceLine(collaborator_service_type) for _ in range(nr_of_collaborators)]
+
+    #############################################################################################
+    # METHODS(myServiceLineHierarchy): RESET
+    # This methond brings the hierarchy back to the state of a new one (see myServiceLine.reset): the chief and the
+    # collaborators are reset and the PRNG of the hierarchy is seeded again (None means a random one).
+    def reset(self,seed = None):
+        self.chief.reset()
+        for collaborator in self.list_of_collaborators:
+            collaborator.reset()
+        self._rng = np.random.default_rng(seed)
 
     #############################################################################################
     # METHODS(myServiceLineHierarchy): TIMELINE SIMULATION
@@ -454,100 +1067,154 @@ class myServiceLineHierarchy:
     # It runs the simulation of the HIERARCHICAL service line work from 0 to TOTAL_NR_OF_TIME_UNITS in a unique timeline.
     # The arrivals LOG is very important if you want to run a simulation using the same request of another service line
     # that already worked, this to compare the performances. If you don't use it the method considers it empty and then
-    # makes it during the simulation.
-    def run(self,arrivals = []):
-        global TOTAL_NR_OF_TIME_UNITS, REQUEST_PROBABILITY_PER_TIME_UNIT, RANDOM_MAX_TIME_TO_SERVE_A_REQUEST, TIME_TO_SERVE_A_REQUEST, PRIORITY_PROBABILITY_PER_REQUEST
+    # makes it before the simulation (by the PRNG of the hierarchy). The arrivals can also be given already as arrays by
+    # arrival_arrays (then the LOG is not used): a tuple (time units, times to serve, priorities, delegations) sorted by time unit.
+    # The timeline itself is simulated by run_timeline_kernel on arrays (with DEBUG set, step by step on the queues
+    # of the lines, see run_on_queues).
+    # The performance parameters are written in out if given (a np.array of 5 floats), otherwise in a new one.
+    def run(self,arrivals = None,out = None,arrival_arrays = None):
+        T = TOTAL_NR_OF_TIME_UNITS
+        nr_of_parts = self.nr_of_collaborators + 1
+        if arrival_arrays is not None:
+            # there are predefined arrivals already as arrays, they are used as they are:
+            (arrivals_t,arrivals_w,arrivals_p,arrivals_d) = arrival_arrays
+        elif not arrivals:
+            # there are not predefined arrivals so the request arrivals are simulated now for the entire timeline,
+            # with one vectorized PRNG draw for every decision of all the time units:
+            rng = self._rng
+            # a new request is arrived in the time units where the random number is less than REQUEST_PROBABILITY_PER_TIME_UNIT:
+            arrivals_t = np.flatnonzero(rng.random(T) < REQUEST_PROBABILITY_PER_TIME_UNIT).astype(np.int32)
+            k = arrivals_t.shape[0]     # the other decisions are drawn only for the arrived requests
+            if RANDOM_VARIABLE_WEIGHTS:
+                # the weight of the request is random, get it from the PRNG (it is the minimum time to serve it):
+                arrivals_w = rng.integers(1,RANDOM_MAX_TIME_TO_SERVE_A_REQUEST+1,k,dtype=np.int32)
+            else:
+                # the weight of the request is NOT random, set it to TIME_TO_SERVE_A_REQUEST
+                arrivals_w = np.full(k,TIME_TO_SERVE_A_REQUEST,dtype=np.int32)
+            # the request is with priority if the random number is less than PRIORITY_PROBABILITY_PER_REQUEST (when the
+            # RANDOM_PRIORITY_SET parameter is False no priority can be set, the threshold is 0) and it can be subdivided
+            # into sub-requests if the random number is less than SUBREQUEST_PROBABILITY_PER_REQUEST, one draw for both:
+            thresholds = np.array([[PRIORITY_PROBABILITY_PER_REQUEST if RANDOM_PRIORITY_SET else 0.0],[SUBREQUEST_PROBABILITY_PER_REQUEST]])
+            (arrivals_p,arrivals_d) = (rng.random((2,k)) < thresholds).astype(np.uint8)
+            # the weights (time to live) of every sub-request and of the main new request is the weight divided into n + 1
+            # where n is the number of collaborators. We add one to avoid having 0 weight any case:
+            arrivals_w = np.where(arrivals_d != 0,arrivals_w//nr_of_parts + 1,arrivals_w).astype(np.int32)
+        else:
+            # there are predefined arrivals so we get the requests from the existing arrivals LOG provided as input of the method,
+            # sorted by time unit (all the requests of a time unit in the timeline arrive):
+            log = np.array(arrivals,dtype=np.int32).reshape(-1,4)
+            order = np.argsort(log[:,0],kind="stable")
+            order = order[(log[order,0] >= 0) & (log[order,0] < T)]    # the records out of the timeline are ignored
+            arrivals_t = log[order,0]
+            arrivals_w = log[order,1]
+            arrivals_p = log[order,2].astype(np.uint8)
+            arrivals_d = log[order,3].astype(np.uint8)
+        if self.nr_of_collaborators == 0:
+            # without collaborators no request can be delegated:
+            arrivals_d = np.zeros(arrivals_t.shape[0],dtype=np.uint8)
+        if self.chief.service_type == RANDOMCHOICE or (self.list_of_collaborators and self.list_of_collaborators[0].service_type == RANDOMCHOICE):
+            # the random choices (of the kernel or of the queues of the lines, the same draws) are seeded by the PRNG of the hierarchy:
+            seed_kernels(int(self._rng.integers(2**31)))
+        if __debug__ and DEBUG:
+            # the step by step simulation works on the queues of the lines:
+            arrivals = list(zip(arrivals_t.tolist(),arrivals_w.tolist(),(arrivals_p != 0).tolist(),(arrivals_d != 0).tolist()))
+            if not self.run_on_queues(arrivals_by_time_unit(arrivals)):
+                return 0
+            # At the end of the simulation return the performance parameters of the simulation for the chief
+            # (the only observable from outside the system):
+            return self.chief.get_performance_parameters(out)
+        # the same performance parameters of the chief are given by the counters of the kernel:
+        return self.run_on_arrays(arrivals_t,arrivals_w,arrivals_p,arrivals_d,out)
+
+    #############################################################################################
+    # METHODS(myServiceLineHierarchy): TIMELINE SIMULATION ON ARRAYS
+    # This methond receives as input the arrivals as four arrays sorted by time unit (time units, times to serve,
+    # priorities, delegations) and simulates the timeline by run_timeline_kernel. Then it sets the arrivals LOG, the
+    # final queues and the counters of every line (see myServiceLine._load_queue) and the sub-requests of the chief, and
+    # it returns the performance parameters of the chief written in out if given (a np.array of 5 floats), otherwise in a new one.
+    # The random choices are drawn from the PRNG of the kernels (seeded by run).
+    def run_on_arrays(self,arrivals_t,arrivals_w,arrivals_p,arrivals_d,out = None):
+        lines = [self.chief] + self.list_of_collaborators
+        (line_counters,percentage,queues) = run_timeline_kernel(arrivals_t,arrivals_w,arrivals_p,arrivals_d,self.chief.service_type,
+                                                                 lines[-1].service_type,self.nr_of_collaborators,TOTAL_NR_OF_TIME_UNITS)
+        # insert the arrived requests in the arrivals LOG of the chief and the sub-requests in the ones of the collaborators:
+        t = arrivals_t.tolist()
+        w = arrivals_w.tolist()
+        p = (arrivals_p != 0).tolist()
+        d = (arrivals_d != 0).tolist()
+        self.chief.arrivals.extend(zip(t,w,p,d))
+        delegated = [(x,y,z,False) for (x,y,z,g) in zip(t,w,p,d) if g]
+        for (c,line) in enumerate(lines):
+            if c > 0:
+                line.arrivals.extend(delegated)
+            line._load_queue(c,line_counters,percentage,queues)
+        # link the sub-requests of every collaborator to the WAITING request of the chief delegating them
+        # (in the order of the collaborators, as in run_on_queues):
+        parent = queues[7]
+        for (c,line) in enumerate(self.list_of_collaborators,1):
+            delegated_slots = np.flatnonzero(parent[c,:line._len] >= 0)
+            if delegated_slots.shape[0] > 0:
+                line._parent_line = self.chief
+            for (i,chief_slot) in zip(delegated_slots.tolist(),parent[c,delegated_slots].tolist()):
+                self.chief._sub_requests.setdefault(chief_slot,[]).append(myServiceRequest(line,i))
+        # return the performance parameters of the chief (the only observable from outside the system):
+        return self.chief.get_performance_parameters(out)
+
+    #############################################################################################
+    # METHODS(myServiceLineHierarchy): TIMELINE SIMULATION ON THE QUEUES
+    # This methond receives as input the arrivals LOG indexed by time unit (see arrivals_by_time_unit) and simulates
+    # the timeline on the queues of the lines (request objects), also step by step if DEBUG is set.
+    # It returns False if the simulation has been stopped (step by step), otherwise True.
+    def run_on_queues(self,arrivals_log):
+        # local bindings of the lines (and their methods) used at every time unit:
+        chief = self.chief
+        lines = [chief] + self.list_of_collaborators
+        chief_insert = self.chief.insert_new_incoming_request
+        chief_process = self.chief.process_queued_requests
+        collaborator_inserts = [c.insert_new_incoming_request for c in self.list_of_collaborators]
+        collaborator_processes = [c.process_queued_requests for c in self.list_of_collaborators]
         # run for the entire timeline:
         for time_unit in range(TOTAL_NR_OF_TIME_UNITS):
             # 
-            ####### If you want to see the simulation step by step uncomment the following code #########
+            ####### If you want to see the simulation step by step set DEBUG to True (python -O skips it anyway) #########
             #
-            #active = [g for g in self.chief.queue if g.status == ACTIVE_REQUEST or g.status == WAITING_REQUEST]
-            #if active != []:
-            #    print("Time unit:",time_unit)
-            #    self.show_hierarchy()
-            #    a = input("")
-            #    if a == "s": return 0
+            if __debug__ and DEBUG:
+                # show the hierarchy when the chief has requests still to be handled (ACTIVE or WAITING):
+                if (self.chief._status[:self.chief._len] != REQUEST_COMPLETION).any():
+                    print("Time unit:",time_unit)
+                    self.show_hierarchy()
+                    a = input("")
+                    if a == "s": return False
             #
-            if arrivals == []:
-                # there are not predefined arrivals so the request arrivals are simulated now:
-                if random.random() <  REQUEST_PROBABILITY_PER_TIME_UNIT:
-                    # if the random number (PRNG) is less than REQUEST_PROBABILITY_PER_TIME_UNIT then a new request is arrived:
-                    if RANDOM_VARIABLE_WEIGHTS:
-                        # the weight of the request is random, get it from the PRNG (it is the minimum time to serve it):
-                        random_time_to_serve_a_request = random.randint(1,RANDOM_MAX_TIME_TO_SERVE_A_REQUEST)
-                    else:
-                        # the weight of the request is NOT random, set it to TIME_TO_SERVE_A_REQUEST
-                        random_time_to_serve_a_request = TIME_TO_SERVE_A_REQUEST
-                    # evaluate the priority of the request always by a PRNG:
-                    activate_prioritized_request = False  # Set to NO priority.
-                    if RANDOM_PRIORITY_SET:
-                        # the priority can be set (when the RANDOM_PRIORITY_SET parameter is False no priority can be set):
-                        if random.random() <  PRIORITY_PROBABILITY_PER_REQUEST:
-                            # if the PRNG generates a random number that is less than PRIORITY_PROBABILITY_PER_REQUEST
-                            # the request is with priority:
-                            activate_prioritized_request = True
-                    # evaluate if there are sub-requests for the new request and all of their weights:
-                    if random.random() <  SUBREQUEST_PROBABILITY_PER_REQUEST:
-                        # if the PRNG generates a number less than SUBREQUEST_PROBABILITY_PER_REQUEST the new request can
-                        # be subdivided into sub-requests:
-                        sub_requests = list()   # Set and empty list of sub-requests
-                        # the weights (time to live) of every sub-request and of the main new request is the already calculated
-                        # weight divided into n + 1 where n is the number of collaborators. We add one to avoid having 0 weight
-                        # any case:
-                        random_time_to_serve_a_subrequest = int(random_time_to_serve_a_request/(self.nr_of_collaborators+1)) + 1
-                        # insert n + 1 new requests: 1 in the queue of the chief and 1 in the queue of every collaborator:
-                        for i in range(self.nr_of_collaborators):
-                            sub_requests.append(self.list_of_collaborators[i].insert_new_incoming_request(time_unit,random_time_to_serve_a_subrequest,activate_prioritized_request))       
-                        self.chief.insert_new_incoming_request(time_unit,random_time_to_serve_a_subrequest,activate_prioritized_request,sub_requests)
-                    else:
-                        # if the PRNG generates a number NOT less than SUBREQUEST_PROBABILITY_PER_REQUEST the new request CANNOT
-                        # be subdivided into sub-requests, so insert only the new request in the queue of the chief:
-                        self.chief.insert_new_incoming_request(time_unit,random_time_to_serve_a_request,activate_prioritized_request)
-                else:
-                    # if the random number (PRNG) is NOT less than REQUEST_PROBABILITY_PER_TIME_UNIT: 
-                    self.chief.process_queued_requests(time_unit)   # serve the requests in the queue of the chief
-                    for i in range(self.nr_of_collaborators):       # serve the requests in all the queues of every collaborator
-                        self.list_of_collaborators[i].process_queued_requests(time_unit)
+            # get the list of (time_unit,time_to_serve,priority,is_delegated) from the LOG where time_unit is the same as the current one:
+            search_result_list = arrivals_log[time_unit]
+            if search_result_list is None:
+                if chief._n_completed == chief._len:
+                    # all the requests of the chief are completed and so their sub-requests (the collaborators only have
+                    # sub-requests): nothing to be handled in the hierarchy, it is an empty time unit for every line
+                    for line in lines:
+                        line.nr_of_times_empty_line += 1
+                        if line._len > 0: line.percentage_of_active_requests = 0.0
+                    continue
+                # if there is no request in the LOG for this time unit
+                # we just serve the existing requests in all the queues of the chief and collaborators:
+                chief_process(time_unit)
+                for process in collaborator_processes:
+                    process(time_unit)
             else:
-                # there are predefined arrivals so we can get the requests from the existing arrivals LOG provided as input of the method
-                # get the list of (time_unit,time_to_serve,priority,is_delegated) from the LOG where time_unit is the same as the current one:
-                search_result_list = [(x,y,z,h) for (x,y,z,h) in arrivals if x == time_unit]
-                if search_result_list == []:
-                    # if the list is empty then we have already inserted all the requests in the LOG
-                    # so, we just serve the existing requests in all the queues of the chief and collaborators:
-                    self.chief.process_queued_requests(time_unit)
-                    for i in range(self.nr_of_collaborators):
-                        self.list_of_collaborators[i].process_queued_requests(time_unit)
-                else:
-                    # if the list is NOT empty we get the first element of the list and create the corrisponding new request in the queues
-                    # of the chief and the collaborators:
-                    (_,time_to_serve_the_request,activate_priority,delegated) = search_result_list[0]
+                # if the list is NOT empty we create the corrisponding new requests in the queues
+                # of the chief and the collaborators:
+                for (_,time_to_serve_the_request,activate_priority,delegated) in search_result_list:
                     if delegated:   # the request in the LOG can be subdivided into sub-requests:
-                        sub_requests = list()   # create the sub-requests and insert them in the queues:
-                        for i in range(self.nr_of_collaborators):
-                            sub_requests.append(self.list_of_collaborators[i].insert_new_incoming_request(time_unit,time_to_serve_the_request,activate_priority))       
-                        self.chief.insert_new_incoming_request(time_unit,time_to_serve_the_request,activate_priority,sub_requests)
+                        # create the sub-requests and insert them in the queues:
+                        sub_requests = [insert(time_unit,time_to_serve_the_request,activate_priority) for insert in collaborator_inserts]
+                        chief_insert(time_unit,time_to_serve_the_request,activate_priority,sub_requests)
                     else:
                         # the request in the LOG CANNOT be subdivided into sub-requests, so
                         # insert only the new request in the queue of the chief:
-                        self.chief.insert_new_incoming_request(time_unit,time_to_serve_the_request,activate_priority)
-        # At the end of the simulation:
-        # 1) look for all the requests in the queue that are completed (status REQUEST_COMPLETION):
-        d = [(r.time_of_completion-r.time_to_start-r.minimum_duration) for r in self.chief.queue if r.status == REQUEST_COMPLETION]
-        if d == []:
-            # if there are not completed requests then a WARNING is issued and the simulation stopped:
-            print("SIMULATION WARNING: there are not completed requests for service line [",self.chief.service_line_id,"]")
-            print("...simulation cannot go on!")
-            quit()
-        # if there are complete requests we calculate for each of them the extra time of working that is
-        # (actual_end_time - actual_start_time - minimum_required_time) only related to the cbief
-        # just after that get the mean of the values in the list (average extra time of working during the simulation):
-        average_extra_duration = np.mean(np.array(d))
-        # 2) calculate the average_active_requests_for_time_unit (only related to the chief):
-        average_active_requests_for_time_unit = self.chief.accumulate_nr_of_active_requests/TOTAL_NR_OF_TIME_UNITS
-        # 3) return the performance parameters of the simulation for the chief (the only observable from outside the system):
-        return np.array([average_extra_duration,average_active_requests_for_time_unit,self.chief.nr_of_times_empty_line,self.chief.percentage_of_active_requests,self.chief.max_nr_of_pending_requests])
+                        chief_insert(time_unit,time_to_serve_the_request,activate_priority)
+        return True
+
  
     #############################################################################################
     # METHODS(myServiceLineHierarchy): PRINT DETAILS
@@ -564,6 +1231,26 @@ class myServiceLineHierarchy:
     
 
 
+#############################################################################################
+# PROCEDURE: ARRIVALS LOG BY TIME UNIT
+# It indexes the arrivals LOG by time unit in a single pass: it returns a list with an item for every
+# time unit of the timeline, None if no request arrives in it, otherwise the list of the records of the LOG
+# (time_unit,time_to_serve,priority,is_delegated) arriving in it (in the order of the LOG).
+# The index is used by myServiceLineHierarchy.run_on_queues (the step by step simulation).
+#############################################################################################
+def arrivals_by_time_unit(arrivals):
+    by_time_unit = [None]*TOTAL_NR_OF_TIME_UNITS
+    for rec in arrivals:
+        t = rec[0]
+        if 0 <= t < TOTAL_NR_OF_TIME_UNITS:     # the requests out of the timeline never arrive
+            if by_time_unit[t] is None:
+                by_time_unit[t] = [rec]
+            else:
+                by_time_unit[t].append(rec)
+    return by_time_unit
+
+
+
 #############################################################################################
 # PROCEDURE: SHOW SIMULATION PARAMETERS
 #############################################################################################
@@ -585,15 +1272,17 @@ def show_simulation_parameters():
     
 #############################################################################################
 # FUNCTION: GET TOTAL PERFORMANCE SCORE (np.array)
+# The results can be the performance parameters of a simulation (5 values) or of many of them (n,5) at once,
+# the score is calculated for every one of them.
 #############################################################################################
 def get_total_score(results):
-    global TIME_TO_SERVE_A_REQUEST, RANDOM_MAX_TIME_TO_SERVE_A_REQUEST, TOTAL_NR_OF_TIME_UNITS
+    results = np.asarray(results)
     max_average_extra_time_for_request = 4*RANDOM_MAX_TIME_TO_SERVE_A_REQUEST
-    max_average_active_request_per_time_unit = results[4]
+    max_average_active_request_per_time_unit = results[...,4]
     max_empty_slots = 1.0
     max_queue_length = TOTAL_NR_OF_TIME_UNITS/RANDOM_MAX_TIME_TO_SERVE_A_REQUEST
     max_unserved_requests = 1.0
-    return -results[0]/max_average_extra_time_for_request-results[1]/max_average_active_request_per_time_unit+results[2]/TOTAL_NR_OF_TIME_UNITS-results[4]/max_queue_length-results[3]
+    return -results[...,0]/max_average_extra_time_for_request-results[...,1]/max_average_active_request_per_time_unit+results[...,2]/TOTAL_NR_OF_TIME_UNITS-results[...,4]/max_queue_length-results[...,3]
 #############################################################################################
 
 
@@ -623,10 +1312,9 @@ def show_clusters_of_requests(service_type = SEQUENTIAL):
     print("Arrived requests:")
     print(service_line.arrivals)                # show the arrivals of requests LOG
     # get the timestamps of the arrivals from the LOG:
-    arrivals_timestamps = [x for (x,_,_,_) in service_line.arrivals]
+    arrivals_timestamps = np.fromiter((x for (x,_,_,_) in service_line.arrivals),dtype=np.int64,count=len(service_line.arrivals))
     differences = np.diff(arrivals_timestamps)  # Calculate differences between consecutive timestamps
-    p25 = np.percentile(differences,25)         # get the percentile 25
-    p90 = np.percentile(differences,90)         # get the percentile 90
+    (p25,p90) = np.percentile(differences,[25,90])  # get the percentiles 25 and 90
     threshold = (p25+p90)/2                     # define the threshold for defining the clusters by the mean of the percentiles
     split_indices = np.where(differences > threshold)[0] + 1    # Identify split points where gap exceeds the threshold
     clusters = np.split(arrivals_timestamps,split_indices)      # Split the array into the defined clusters
@@ -634,8 +1322,12 @@ def show_clusters_of_requests(service_type = SEQUENTIAL):
     for c in clusters:                          # print the clusters
         print(c)
     cluster_count = len(clusters)                           # get the number of clusters
-    durations = np.array([c[-1]-c[0] for c in clusters])    # get the time elapsed from the first to the last request in a cluster
-    sizes = np.array([len(c) for c in clusters])            # get the number of requests in each cluster
+    # the clusters are given by the split points: get the first and the last timestamp of every cluster
+    bounds = np.concatenate(([0],split_indices,[len(arrivals_timestamps)]))
+    firsts = arrivals_timestamps[bounds[:-1]]
+    lasts = arrivals_timestamps[bounds[1:]-1]
+    durations = lasts - firsts          # get the time elapsed from the first to the last request in a cluster
+    sizes = np.diff(bounds)             # get the number of requests in each cluster
     # show the results:
     print(f"{GREEN}###############################################################")
     print(f"Cluster count:",cluster_count)
@@ -646,16 +1338,21 @@ def show_clusters_of_requests(service_type = SEQUENTIAL):
     print(f"###############################################################{RESET}")
     # draw the timeline and the clusters with different colors:
     print("Timeline, requests and clusters:")
+    # flag the time units inside a cluster (the timestamps of a cluster are sorted, it goes from the first to the last):
+    in_cluster = np.zeros(TOTAL_NR_OF_TIME_UNITS,dtype=bool)
+    for (first,last) in zip(firsts.tolist(),lasts.tolist()):
+        in_cluster[first:last+1] = True
+    arrivals_set = set(arrivals_timestamps.tolist())    # time units with an arrival (direct lookup)
     r_count = 1
     for i in range(TOTAL_NR_OF_TIME_UNITS):
-        if any(min(c) <= i <= max(c) for c in clusters):
-            if i in arrivals_timestamps:
+        if in_cluster[i]:
+            if i in arrivals_set:
                 print(f"{RED}R",r_count,f"{RESET}",end="")
                 r_count += 1
             else:
                 print(f"{RED}_{RESET}",end="")
         else:
-            if i in arrivals_timestamps:
+            if i in arrivals_set:
                 print("R",r_count,end="")
                 r_count += 1
             else:
@@ -664,6 +1361,81 @@ def show_clusters_of_requests(service_type = SEQUENTIAL):
 #############################################################################################
 
 
+#############################################################################################
+# PROCEDURE: ENVIRONMENTS OF A SAMPLE
+# It creates the simulated environments of a sample as a list h[] of 9 items: the 4 hierarchies and the 5 single
+# lines (the item of the single SEQUENTIAL line is None, its samples are run in a batch, see the full emulation).
+# The environments are created once in every process and reset for every sample (see simulate_sample).
+#############################################################################################
+def make_sample_environments():
+    nr_of_simulated_environments = 9  # total number of simulated environments
+    # Set a list of None, every structure object in the simulation will be pointed by the variables of this list h[]:
+    h = [None for _ in range(nr_of_simulated_environments)]
+    #
+    # Hierarchical lines simulated:
+    #
+    h[0] = myServiceLineHierarchy(chief_service_type = SEQUENTIAL, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = SEQUENTIAL)
+    h[1] = myServiceLineHierarchy(chief_service_type = CONCURRENT, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = SEQUENTIAL)
+    h[2] = myServiceLineHierarchy(chief_service_type = SEQUENTIAL, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = CONCURRENT)
+    h[3] = myServiceLineHierarchy(chief_service_type = CONCURRENT, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = CONCURRENT)
+    #
+    # Single lines simulated (h[4] is the SEQUENTIAL one, run in a batch):
+    #
+    h[5] = myServiceLine(CONCURRENT)
+    h[6] = myServiceLine(LOOKFORMAX)
+    h[7] = myServiceLine(LOOKFORMIN)
+    h[8] = myServiceLine(RANDOMCHOICE)
+    return h
+#############################################################################################
+
+SAMPLE_ENVIRONMENTS = None  # environments of the samples of this process (created by the first sample)
+
+#############################################################################################
+# PROCEDURE: SIMULATION OF A SAMPLE OF ALL THE ENVIRONMENTS
+# It runs a sample of all the simulated environments on the same arrivals (made by the first hierarchy with a PRNG
+# seed derived from the one given as input, the RANDOMCHOICE line gets another independent one) and returns their performance parameters as a (9,5) np.array, one row for every
+# environment (the row of the single SEQUENTIAL line is zero, its samples are run in a batch, see the full emulation).
+# It returns None if a simulation of the sample has no completed requests (the sample is discarded).
+#############################################################################################
+def simulate_sample(seed):
+    global SAMPLE_ENVIRONMENTS
+    if SAMPLE_ENVIRONMENTS is None:
+        SAMPLE_ENVIRONMENTS = make_sample_environments()
+    h = SAMPLE_ENVIRONMENTS
+    sample_results = np.zeros((len(h),5),dtype=float)   # performance parameters of every environment
+    # independent seeds (children of the seed of the sample) for the arrivals and for the random choices:
+    (arrivals_seed,random_choice_seed) = np.random.SeedSequence(seed).spawn(2)
+    try:
+        #
+        # Hierarchical lines simulated:
+        #
+        # the hierarchy SEQUENTIAL CHIEF SEQUENTIAL COLLABORATORS makes the arrivals (by the seed of the arrivals):
+        h[0].reset(arrivals_seed)
+        # run the simulation and get the results
+        h[0].run(out = sample_results[0])
+        # the first time get the arrivals too, prepared once for all the other simulations of the sample:
+        # as arrays for the hierarchies, as the arrays of the delegated requests (with the whole weight) for the single lines:
+        log = np.array(h[0].chief.arrivals,dtype=np.int32).reshape(-1,4)
+        arrivals_for_hierarchy = (log[:,0],log[:,1],log[:,2].astype(np.uint8),log[:,3].astype(np.uint8))
+        delegated = log[:,3] != 0
+        arrivals_for_single_line = (log[delegated,0],(NR_OF_COLLABORATORS+1)*log[delegated,1],log[delegated,2].astype(np.uint8))
+        # the other hierarchies (CONCURRENT-SEQUENTIAL, SEQUENTIAL-CONCURRENT, CONCURRENT-CONCURRENT) run on the same arrivals:
+        for j in range(1,4):
+            h[j].reset()
+            h[j].run(out = sample_results[j],arrival_arrays = arrivals_for_hierarchy)
+        #
+        # Single lines simulated:
+        #
+        # the SEQUENTIAL service line does not use the arrivals of the hierarchy, all its samples are run in a batch at the end.
+        # The CONCURRENT, LOOKFORMAX, LOOKFORMIN and RANDOMCHOICE (by the seed of the random choices) lines run on the delegated requests:
+        for j in range(5,9):
+            h[j].reset(random_choice_seed if h[j].service_type == RANDOMCHOICE else None)
+            h[j].run(out = sample_results[j],arrival_arrays = arrivals_for_single_line)
+        return sample_results
+    except RuntimeError as error:
+        # a simulation of the sample has no completed requests: the sample is discarded
+        print(error,"- sample",seed,"discarded")
+        return None
 #############################################################################################
 # PROCEDURE: FULL EMULATION
 #            run many service line structures, with the same strategies, NR_OF_SAMPLES times.
@@ -671,8 +1443,8 @@ def show_clusters_of_requests(service_type = SEQUENTIAL):
 def emulate_multiple_lines_multiple_strategies():
     global NR_OF_SAMPLES, NR_OF_COLLABORATORS, SEQUENTIAL, CONCURRENT, LOOKFORMAX, LOOKFORMIN, RANDOMCHOICE
     nr_of_simulated_environments = 9  # total number of simulated environments
-    # set the np.array for results to zeros:
-    simulation_results = np.array([np.zeros(5,dtype=float) for _ in range(nr_of_simulated_environments)])
+    # set the np.array for results to zeros (one row of performance parameters for every environment):
+    simulation_results = np.zeros((nr_of_simulated_environments,5),dtype=float)
     # Set the names of the simulations:
     simulation_descriptions = [ "Hierarchical (Chief sequential - Collaborators sequential)",
                                 "Hierarchical (Chief concurrent - Collaborators sequential)",
@@ -687,61 +1459,32 @@ def emulate_multiple_lines_multiple_strategies():
     print("Number of samples:",NR_OF_SAMPLES)   # show the number of times the simulation on sigle timeline will be repeated
     show_simulation_parameters()                # show the simulation parameters
     print("Simulations in progress...")
-    # Set a list of None, every structure object in the simulation will be pointed by the variables of this list h[]:
-    h = [None for _ in range(nr_of_simulated_environments)]
-    for i in range(NR_OF_SAMPLES):  # the simulation of every environment will be performed NR_OF_SAMPLES times
-        if i % 100 == 0: print("step",i,"out of",NR_OF_SAMPLES)     # show the progress
-        j = 0
-        #
-        # Hierarchical lines simulated:
-        #
-        # create the hierarchy SEQUENTIAL CHIEF SEQUENTIAL COLLABORATORS:
-        h[j] = myServiceLineHierarchy(chief_service_type = SEQUENTIAL, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = SEQUENTIAL)
-        # run the simulation and get the results
-        simulation_results[j] += h[j].run()
-        # the first time get the arrivals too:
-        arrivals_for_hierarchy = h[j].chief.arrivals
-        arrivals_for_single_line = [(x,(NR_OF_COLLABORATORS+1)*time_to_serve_the_request,y,delegated) for (x,time_to_serve_the_request,y,delegated) in h[j].chief.arrivals if delegated]
-        j += 1
-        # create the hierarchy CONCURRENT CHIEF SEQUENTIAL COLLABORATORS and run the simulation collecting the results:
-        h[j] = myServiceLineHierarchy(chief_service_type = CONCURRENT, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = SEQUENTIAL)
-        simulation_results[j] += h[j].run(arrivals_for_hierarchy)
-        j += 1
-        # create the hierarchy SEQUENTIAL CHIEF CONCURRENT COLLABORATORS and run the simulation collecting the results:
-        h[j] = myServiceLineHierarchy(chief_service_type = SEQUENTIAL, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = CONCURRENT)
-        simulation_results[j] += h[j].run(arrivals_for_hierarchy)
-        j += 1
-        # create the hierarchy CONCURRENT CHIEF CONCURRENT COLLABORATORS and run the simulation collecting the results:
-        h[j] = myServiceLineHierarchy(chief_service_type = CONCURRENT, nr_of_collaborators = NR_OF_COLLABORATORS, collaborator_service_type = CONCURRENT)
-        simulation_results[j] += h[j].run(arrivals_for_hierarchy)
-        j += 1
-        #
-        # Single lines simulated:
-        #
-        # create the SEQUENTIAL service line, run the simulation and collect the results:
-        h[j] = myServiceLine(SEQUENTIAL)
-        simulation_results[j] += h[j].run()
-        j += 1
-        # create the CONCURRENT service line, run the simulation and collect the results:
-        h[j] = myServiceLine(CONCURRENT)
-        simulation_results[j] += h[j].run(arrivals_for_single_line)
-        j += 1
-        # create the LOOKFORMAX service line, run the simulation and collect the results:
-        h[j] = myServiceLine(LOOKFORMAX)
-        simulation_results[j] += h[j].run(arrivals_for_single_line)
-        j += 1
-        # create the LOOKFORMIN service line, run the simulation and collect the results:
-        h[j] = myServiceLine(LOOKFORMIN)
-        simulation_results[j] += h[j].run(arrivals_for_single_line)
-        j += 1
-        # create the RANDOMCHOICE service line, run the simulation and collect the results:
-        h[j] = myServiceLine(RANDOMCHOICE)
-        simulation_results[j] += h[j].run(arrivals_for_single_line)
-        j += 1
-    print("done:",j," strategies.")
+    # the samples are independent, they are simulated in parallel by a pool of processes (one for every core),
+    # the sample i uses the PRNG seed (seed + i):
+    seed = int(np.random.default_rng().integers(2**31-NR_OF_SAMPLES))
+    chunksize = max(1,NR_OF_SAMPLES//(4*multiprocessing.cpu_count()))
+    nr_of_valid_samples = 0     # the samples without completed requests are discarded
+    with multiprocessing.Pool() as pool:
+        for (i,sample_results) in enumerate(pool.imap_unordered(simulate_sample,range(seed,seed+NR_OF_SAMPLES),chunksize)):
+            if i % 100 == 0: print("step",i,"out of",NR_OF_SAMPLES)     # show the progress
+            if sample_results is not None:
+                simulation_results += sample_results
+                nr_of_valid_samples += 1
+    if nr_of_valid_samples == 0:
+        print("SIMULATION WARNING: there are not completed requests in any sample")
+        print("...simulation cannot go on!")
+        quit()
+    # run all the samples of the SEQUENTIAL service line in parallel and collect the results:
+    batch_results = myServiceLine.run_batch(SEQUENTIAL,NR_OF_SAMPLES)
+    simulation_results[4] += batch_results.sum(axis=0)
+    # get the average of the results of every environment on its valid samples:
+    nr_of_results = np.full((nr_of_simulated_environments,1),nr_of_valid_samples,dtype=float)
+    nr_of_results[4] = batch_results.shape[0]
+    simulation_results /= nr_of_results
+    print("done:",nr_of_simulated_environments," strategies.")
     print("Results:") # sort performance results and show them in order from the worst to the best:
     print("---------------------------------------------------------------------------------------------------")
-    score = np.array([get_total_score(simulation_results[i]/NR_OF_SAMPLES) for i in range(nr_of_simulated_environments)])
+    score = get_total_score(simulation_results)
     desc = np.array(simulation_descriptions)
     idx = np.argsort(score)
     score_sorted = score[idx]
@@ -752,7 +1495,7 @@ def emulate_multiple_lines_multiple_strategies():
     print("---------------------------------------------------------------------------------------------------")
     for i in range(nr_of_simulated_environments):
         print("Strategy: ",desc_sorted[i]," - ",end="")
-        show_results(results_sorted[i]/NR_OF_SAMPLES)
+        show_results(results_sorted[i])
     print("End.")
 #############################################################################################
 